@@ -11,27 +11,70 @@ Usage:
 """
 
 import argparse
+import asyncio
+import collections
 import io
+import itertools
 import logging
+import os
+import queue
+import socket
 import sys
+import threading
 import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime
 from pathlib import Path
 
 try:
-    from picamera2 import Picamera2
+    from picamera2 import MappedArray, Picamera2
     from picamera2.configuration import CameraConfiguration
+    from picamera2.encoders import JpegEncoder
+    from picamera2.outputs import Output
 except ImportError:
     print("ERROR: picamera2 not found. This must be run on a Raspberry Pi.")
     print("Install with: sudo apt install -y python3-picamera2")
     sys.exit(1)
 
+try:
+    from PIL import Image
+except ImportError:
+    print("ERROR: Pillow not found. Install with: pip install Pillow")
+    sys.exit(1)
+
 try:
     import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.retry import Retry
 except ImportError:
     print("ERROR: requests not found. Install with: pip install requests")
     sys.exit(1)
 
+try:
+    import setproctitle
+except ImportError:
+    # Optional: only used to give the process a recognisable name in ps/top
+    setproctitle = None
+
+try:
+    import websocket
+except ImportError:
+    # Optional: without websocket-client the heartbeat polls /status instead
+    websocket = None
+
+try:
+    import httpx
+except ImportError:
+    # Optional: only needed for --transport httpx
+    httpx = None
+
+try:
+    from turbojpeg import TJSAMP_420, TurboJPEG
+except ImportError:
+    # Optional: fall back to PIL's JPEG encoder when PyTurboJPEG is missing
+    TurboJPEG = None
+
 
 # Configure logging
 logging.basicConfig(
@@ -40,11 +83,120 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Exceptions that mean an upload request failed, for whichever transport is in use
+UPLOAD_ERRORS = (requests.exceptions.RequestException,) + ((httpx.HTTPError,) if httpx else ())
+
+# Upload failures that mean the server could not be reached; frames are held
+CONNECTION_ERRORS = (
+    (requests.exceptions.ConnectionError, requests.exceptions.Timeout)
+    + ((httpx.TransportError,) if httpx else ())
+)
+
+# JPEG quality used when encoding captured frames
+JPEG_QUALITY = 85
+
+# Seconds between server heartbeats
+HEARTBEAT_INTERVAL = 1.0
+
+# Frames held for upload while the server is unreachable; oldest are dropped
+RETRY_BUFFER_FRAMES = 30
+
+# Local copies waiting to be written; beyond this, new copies are skipped
+SAVE_QUEUE_FRAMES = 32
+
+# Above this many pixels per frame, JPEG encode and upload cost grows large
+LARGE_FRAME_PIXELS = 4_000_000
+
+
+def _pin_current_thread(cores: set[int] | None, fifo_priority: int = 0):
+    """
+    Restrict the calling thread to `cores` and optionally make it SCHED_FIFO.
+
+    Both are best effort: unsupported platforms and missing CAP_SYS_NICE only
+    log a warning. Threads started afterwards inherit these settings.
+    """
+    if cores is not None:
+        try:
+            os.sched_setaffinity(0, cores)
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not pin thread to CPU(s) {sorted(cores)}: {e}")
+
+    if fifo_priority:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(fifo_priority))
+        except (AttributeError, OSError) as e:
+            logger.warning(f"Could not enable SCHED_FIFO (needs CAP_SYS_NICE): {e}")
+
+
+def _upload_socket_options(sndbuf: int = 0) -> list[tuple[int, int, int]]:
+    """Socket options applied to every upload connection."""
+    options = [
+        (socket.IPPROTO_TCP, socket.TCP_NODELAY, 1),
+        (socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1),
+    ]
+    # Linux only; ACK the response immediately instead of delaying it. The
+    # kernel may clear this again, so it mainly helps the first exchange.
+    if hasattr(socket, 'TCP_QUICKACK'):
+        options.append((socket.IPPROTO_TCP, socket.TCP_QUICKACK, 1))
+    # A fixed SO_SNDBUF disables kernel send-buffer autotuning and is capped by
+    # net.core.wmem_max, so it is only set when explicitly requested
+    if sndbuf > 0:
+        options.append((socket.SOL_SOCKET, socket.SO_SNDBUF, sndbuf))
+    return options
+
+
+class _SocketOptionsAdapter(HTTPAdapter):
+    """HTTPAdapter whose pooled connections are opened with extra socket options."""
+
+    def __init__(self, socket_options: list[tuple[int, int, int]], **kwargs):
+        self.socket_options = socket_options
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        kwargs['socket_options'] = self.socket_options
+        super().init_poolmanager(*args, **kwargs)
+
+
+class _MultipartBody:
+    """Multipart/form-data body sent as a sequence of buffers without joining them."""
+
+    def __init__(self, parts: list[bytes]):
+        self.parts = parts
+        self.length = sum(len(part) for part in parts)
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        # A fresh iterator each time so a retried request resends the body
+        return iter(self.parts)
+
+    async def aiter(self):
+        """Yield the parts asynchronously (httpx.AsyncClient rejects sync streams)."""
+        for part in self.parts:
+            yield part
+
+
+class _FrameSink(Output):
+    """Picamera2 encoder output that passes each finished JPEG to a callback."""
+
+    def __init__(self, callback):
+        super().__init__()
+        self.callback = callback
+
+    def outputframe(self, frame, keyframe=True, timestamp=None, packet=None, audio=False):
+        if self.recording:
+            self.callback(frame)
+
 
 class CameraClient:
     """Client for capturing and uploading camera images."""
 
-    def __init__(self, host: str, port: int, fps: float = 1.0, save_local: bool = False):
+    def __init__(self, host: str, port: int, fps: float = 1.0, save_local: bool = False,
+                 upload_workers: int = 1, capture_mode: str = "request",
+                 width: int = 1280, height: int = 720, batch: int = 1,
+                 transport: str = "requests", sndbuf: int = 0,
+                 capture_core: int | None = None, upload_core: int | None = None):
         """
         Initialize camera client.
 
@@ -53,30 +205,174 @@ class CameraClient:
             port: Port number of MASt3R-SLAM server
             fps: Frames per second to capture (default: 1.0)
             save_local: Save images locally as well (default: False)
+            upload_workers: Number of concurrent upload connections; more than
+                one can deliver frames out of order (default: 1)
+            capture_mode: "request" to capture and encode frames from the loop, or
+                "encoder" to stream frames through Picamera2's JpegEncoder
+                (default: "request")
+            width: Capture width in pixels, scaled by the camera ISP (default: 1280)
+            height: Capture height in pixels, scaled by the camera ISP (default: 720)
+            batch: Maximum frames sent per upload request; needs server support
+                and falls back to 1 otherwise (default: 1)
+            transport: "requests" for pooled HTTP/1.1 keep-alive connections, or
+                "httpx" to multiplex uploads over one HTTP/2 connection
+                (default: "requests")
+            sndbuf: Fixed SO_SNDBUF size in bytes for upload sockets, or 0 to
+                leave it to kernel autotuning (default: 0)
+            capture_core: CPU to pin the capture loop to, also running it as
+                SCHED_FIFO when permitted (default: None, no pinning)
+            upload_core: CPU to pin the upload workers to (default: None)
         """
         self.host = host
         self.port = port
         self.fps = fps
         self.interval = 1.0 / fps
         self.save_local = save_local
+        self.upload_workers = upload_workers
+        self.capture_mode = capture_mode
+        self.size = (width, height)
+        self.batch = max(1, batch)
+        self.transport = transport
+        self.capture_core = capture_core
+        self.upload_core = upload_core
+        self._all_cores = os.sched_getaffinity(0) if hasattr(os, 'sched_getaffinity') else None
         self.upload_url = f"http://{host}:{port}/upload"
+        self.heartbeat_url = f"ws://{host}:{port}/heartbeat"
+
+        # Kept current by the heartbeat thread; while the server is down,
+        # uploaders hold frames in retry_q instead of waiting out timeouts
+        self.server_up = threading.Event()
+        self.retry_q = collections.deque()
+        self.heartbeat_thread = None
+        self._heartbeat_stop = threading.Event()
+
+        # Reuse keep-alive connections for every request to the server; the
+        # pool holds one socket per upload worker so POSTs can overlap, plus
+        # one for /status heartbeat polls so they never displace an upload's
+        socket_options = _upload_socket_options(sndbuf)
+        self.session = requests.Session()
+        self.session.headers["Connection"] = "keep-alive"
+        adapter = _SocketOptionsAdapter(
+            socket_options,
+            pool_connections=2,
+            pool_maxsize=upload_workers + 1,
+            max_retries=Retry(total=2, backoff_factor=0.2, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount("http://", adapter)
+
+        # Multipart framing is fixed apart from the filename, so build it once
+        # and send each frame as preamble + JPEG + terminator buffers
+        boundary = uuid.uuid4().hex
+        self._upload_headers = {"Content-Type": f"multipart/form-data; boundary={boundary}"}
+        self._part_preamble = (
+            f"--{boundary}\r\n"
+            f"Content-Disposition: form-data; name=\"file\"; filename=\"%s\"\r\n"
+            f"Content-Type: image/jpeg\r\n\r\n"
+        ).encode()
+        self._part_end = b"\r\n"
+        self._body_end = f"--{boundary}--\r\n".encode()
+
+        # With httpx, uploads run on a private event loop thread and share a
+        # single HTTP/2 connection (prior knowledge, so the server must speak
+        # h2c); upload workers block on the result as with requests
+        if self.transport == "httpx":
+            if httpx is None:
+                raise RuntimeError("--transport httpx requires httpx: pip install 'httpx[http2]'")
+            self._loop = asyncio.new_event_loop()
+            self._loop_thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+            self._loop_thread.start()
+            self._client = httpx.AsyncClient(
+                transport=httpx.AsyncHTTPTransport(
+                    http1=False,
+                    http2=True,
+                    limits=httpx.Limits(max_connections=1, max_keepalive_connections=1),
+                    socket_options=socket_options
+                ),
+                timeout=30
+            )
+
+        # Test connection to server; this also settles the batch size, so it
+        # must run before the upload queue is sized and frames start arriving
+        self._test_connection()
+
+        # Latest frames waiting for a free uploader (one batch worth); older
+        # frames are dropped rather than queued so upload lag stays bounded
+        self.upload_q = queue.Queue(maxsize=self.batch)
+        self.upload_threads = []
+        self.stats_lock = threading.Lock()
+        self.frame_count = 0
+        self.success_count = 0
+        self.fail_count = 0
+        self.dropped = 0
+        self.missed_slots = 0
 
-        # Create local save directory if needed
+        # Filenames are a per-session wall-clock prefix plus a frame counter
+        # and the monotonic nanoseconds since the prefix's whole second, so
+        # the server gets an absolute, step-free capture time from the name
+        # alone without a strftime call per frame
+        wall_ns, mono_ns = time.time_ns(), time.monotonic_ns()
+        self._prefix = datetime.fromtimestamp(wall_ns // 1_000_000_000).strftime("raspi_cam_%Y%m%d_%H%M%S_")
+        self._mono_origin = mono_ns - wall_ns % 1_000_000_000
+        self._fno = itertools.count()
+
+        # JPEG encoding runs off the capture thread so the next frame can be
+        # requested while the previous one is still being compressed
+        self.encoder = ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="encode", initializer=self._init_encode_thread
+        )
+        self._capture_stopped = False
+        self.tj = None
+        if TurboJPEG is not None:
+            try:
+                self.tj = TurboJPEG()
+            except (OSError, RuntimeError) as e:
+                logger.warning(f"libjpeg-turbo unavailable, using PIL encoder: {e}")
+
+        # Create local save directory if needed; writes happen on their own
+        # thread so a slow SD card never stalls capture or upload
+        self.save_q = queue.Queue(maxsize=SAVE_QUEUE_FRAMES)
+        self.save_dropped = 0
+        self.save_thread = None
         if self.save_local:
             self.save_dir = Path("captured_images")
             self.save_dir.mkdir(exist_ok=True)
 
         # Initialize camera
         logger.info("Initializing Raspberry Pi Camera Module 3...")
+        if width * height > LARGE_FRAME_PIXELS:
+            logger.warning(
+                f"Capture size {width}x{height} is over {LARGE_FRAME_PIXELS / 1e6:.0f} MP; "
+                "JPEG encoding and upload will be slow"
+            )
         try:
             self.camera = Picamera2()
 
-            # Configure camera for still capture
-            config = self.camera.create_still_configuration(
-                main={"size": (4608, 2592)},  # Camera Module 3 max resolution
-                buffer_count=2
-            )
-            self.camera.configure(config)
+            if self.capture_mode == "encoder":
+                # Stream YUV420 frames at the requested rate straight into
+                # Picamera2's JpegEncoder, which encodes on its own threads
+                frame_us = int(1_000_000 / fps)
+                config = self.camera.create_video_configuration(
+                    main={"size": self.size, "format": "YUV420"},
+                    buffer_count=4,
+                    controls={"FrameDurationLimits": (frame_us, frame_us)}
+                )
+                self.camera.configure(config)
+                self.camera.start_encoder(JpegEncoder(q=JPEG_QUALITY), _FrameSink(self._on_encoded_frame))
+            else:
+                # Configure camera for still capture; one buffer is being filled
+                # while up to two completed requests are read by the encoder.
+                # The ISP scales the sensor image down to the requested size.
+                # With libjpeg-turbo the ISP also delivers 4:2:0 YUV planes, so
+                # the encoder skips colour conversion and reads half the bytes
+                # of RGB; PIL needs BGR888 (laid out R, G, B per pixel).
+                config = self.camera.create_still_configuration(
+                    main={"size": self.size, "format": "YUV420" if self.tj else "BGR888"},
+                    buffer_count=3
+                )
+                if self.tj:
+                    # Pad-free planes match TurboJPEG's unified YUV layout
+                    self.camera.align_configuration(config)
+                self.camera.configure(config)
             self.camera.start()
 
             # Give camera time to warm up
@@ -84,47 +380,213 @@ class CameraClient:
 
             logger.info("Camera initialized successfully")
             logger.info(f"Resolution: {config['main']['size']}")
+            if self.capture_mode == "encoder":
+                logger.info("JPEG encoder: Picamera2 JpegEncoder")
+            else:
+                logger.info(f"JPEG encoder: {'libjpeg-turbo' if self.tj else 'PIL'}")
 
         except Exception as e:
             logger.error(f"Failed to initialize camera: {e}")
             raise
 
-        # Test connection to server
-        self._test_connection()
-
     def _test_connection(self):
         """Test connection to MASt3R-SLAM server."""
         try:
             test_url = f"http://{self.host}:{self.port}/status"
-            response = requests.get(test_url, timeout=5)
+            response = self.session.get(test_url, timeout=5)
             if response.status_code == 200:
                 logger.info(f"✓ Connected to MASt3R-SLAM server at {self.host}:{self.port}")
                 logger.info(f"Server status: {response.json()}")
             else:
                 logger.warning(f"Server returned status code: {response.status_code}")
+            self.server_up.set()
         except requests.exceptions.RequestException as e:
             logger.error(f"⚠ Cannot connect to server at {self.host}:{self.port}")
             logger.error(f"Error: {e}")
-            logger.warning("Will attempt to upload anyway...")
+            logger.warning("Frames will be held until the server is reachable...")
+
+        if self.batch > 1:
+            self._check_batch_support()
+
+    def _check_batch_support(self):
+        """Fall back to single-frame uploads unless the server accepts batches."""
+        supported = False
+        try:
+            capabilities_url = f"http://{self.host}:{self.port}/capabilities"
+            response = self.session.get(capabilities_url, timeout=5)
+            if response.status_code == 200:
+                supported = bool(response.json().get('batch_upload'))
+        except (requests.exceptions.RequestException, ValueError) as e:
+            logger.debug(f"Capabilities probe failed: {e}")
+
+        if supported:
+            logger.info(f"Batch uploads enabled: up to {self.batch} frames per request")
+        else:
+            logger.warning("Server does not support batch uploads, sending one frame per request")
+            self.batch = 1
+
+    def _heartbeat_worker(self):
+        """Keep server_up current until shutdown."""
+        use_websocket = websocket is not None
+        while not self._heartbeat_stop.is_set():
+            if use_websocket:
+                try:
+                    self._websocket_heartbeat()
+                except websocket.WebSocketBadStatusException as e:
+                    # Reachable, but no heartbeat endpoint; poll /status instead
+                    logger.info("WebSocket heartbeat unavailable (HTTP %s), polling /status", e.status_code)
+                    use_websocket = False
+                    continue
+                except (websocket.WebSocketException, OSError) as e:
+                    logger.debug("Heartbeat connection lost: %s", e)
+                    self._set_server_up(False)
+            else:
+                self._set_server_up(self._poll_status())
+            self._heartbeat_stop.wait(HEARTBEAT_INTERVAL)
+
+    def _websocket_heartbeat(self):
+        """Ping the server over one persistent WebSocket until it stops answering."""
+        ws = websocket.create_connection(self.heartbeat_url, timeout=3 * HEARTBEAT_INTERVAL)
+        try:
+            self._set_server_up(True)
+            while not self._heartbeat_stop.is_set():
+                ws.ping()
+                # Any frame (normally the pong) proves the server is alive
+                ws.recv_data(control_frame=True)
+                self._set_server_up(True)
+                self._heartbeat_stop.wait(HEARTBEAT_INTERVAL)
+        finally:
+            ws.close()
+
+    def _poll_status(self) -> bool:
+        """Check the server with a short /status request."""
+        try:
+            response = self.session.get(f"http://{self.host}:{self.port}/status", timeout=HEARTBEAT_INTERVAL)
+            return response.status_code == 200
+        except requests.exceptions.RequestException:
+            return False
+
+    def _set_server_up(self, up: bool):
+        """Record server reachability; upload workers send held frames once it is up."""
+        if up == self.server_up.is_set():
+            return
+        if up:
+            logger.info(f"✓ Server at {self.host}:{self.port} is reachable")
+            self.server_up.set()
+        else:
+            logger.warning(f"⚠ Server at {self.host}:{self.port} is unreachable, holding frames")
+            self.server_up.clear()
+
+    def _defer(self, frames: list[tuple[bytes, str]]):
+        """Hold frames for later upload, dropping the oldest beyond the limit."""
+        with self.stats_lock:
+            for frame in frames:
+                if len(self.retry_q) >= RETRY_BUFFER_FRAMES:
+                    self.retry_q.popleft()
+                    self.dropped += 1
+                self.retry_q.append(frame)
 
-    def capture_and_convert(self) -> tuple[bytes, str]:
+    def _requeue(self, frames: list[tuple[bytes, str]]):
+        """Put frames that failed to send back at the front of the held frames."""
+        with self.stats_lock:
+            for frame in reversed(frames):
+                if len(self.retry_q) >= RETRY_BUFFER_FRAMES:
+                    # The requeued frames are the oldest, so they are the ones to drop
+                    self.dropped += 1
+                    continue
+                self.retry_q.appendleft(frame)
+
+    def _take_retries(self) -> list[tuple[bytes, str]]:
+        """Pop the oldest held frames, up to one batch."""
+        with self.stats_lock:
+            return [self.retry_q.popleft() for _ in range(min(self.batch, len(self.retry_q)))]
+
+    def capture_and_convert(self) -> Future:
         """
-        Capture image from camera as JPEG (server will convert to PNG).
+        Capture a frame and hand it to the encoder pool for JPEG conversion.
+
+        The camera buffer is returned to libcamera as soon as the encoder is
+        done with it, so capture can continue while encoding is in flight.
 
         Returns:
-            Tuple of (jpeg_bytes, filename)
+            Future resolving to a tuple of (jpeg_bytes, filename)
         """
-        # Capture image directly as JPEG
-        jpeg_buffer = io.BytesIO()
-        self.camera.capture_file(jpeg_buffer, format='jpeg')
-        jpeg_bytes = jpeg_buffer.getvalue()
+        request = self.camera.capture_request()
+        filename = self._next_filename()
+        return self.encoder.submit(self._encode_request, request, filename)
 
-        # Generate filename
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S_%f")
-        filename = f"raspi_cam_{timestamp}.jpg"
+    def _next_filename(self) -> str:
+        """Generate a filename for the frame being captured now."""
+        return f"{self._prefix}{next(self._fno):08d}_{time.monotonic_ns() - self._mono_origin}.jpg"
+
+    def _encode_request(self, request, filename: str) -> tuple[bytes, str]:
+        """
+        Encode a completed camera request as JPEG (server will convert to PNG).
+
+        The encoder reads the mapped camera buffer in place rather than copying
+        the frame out first; the request is released once encoding finishes.
+        """
+        try:
+            if self.tj is not None:
+                width, height = request.config["main"]["size"]
+                with MappedArray(request, "main", reshape=False, write=False) as m:
+                    jpeg_bytes = self.tj.encode_from_yuv(
+                        m.array, height, width, quality=JPEG_QUALITY, jpeg_subsample=TJSAMP_420
+                    )
+            else:
+                with MappedArray(request, "main", write=False) as m:
+                    jpeg_buffer = io.BytesIO()
+                    Image.fromarray(m.array).save(jpeg_buffer, format="JPEG", quality=JPEG_QUALITY)
+                    # getvalue() hands over the buffer's bytes without copying
+                    jpeg_bytes = jpeg_buffer.getvalue()
+        finally:
+            request.release()
 
         return jpeg_bytes, filename
 
+    def _init_encode_thread(self):
+        """Undo the capture-core pinning that encoder threads inherit."""
+        if self.capture_core is None:
+            return
+        _pin_current_thread(self._all_cores)
+        try:
+            os.sched_setscheduler(0, os.SCHED_OTHER, os.sched_param(0))
+        except (AttributeError, OSError):
+            pass
+
+    def _dispatch_frame(self, future: Future):
+        """Save and queue an encoded frame once its encode has finished."""
+        try:
+            jpeg_bytes, filename = future.result()
+        except Exception as e:
+            logger.error("Error encoding frame: %s", e)
+            with self.stats_lock:
+                self.fail_count += 1
+            return
+
+        self._handle_jpeg(jpeg_bytes, filename)
+
+    def _on_encoded_frame(self, jpeg_bytes: bytes):
+        """Receive a frame from Picamera2's JpegEncoder (encoder capture mode)."""
+        with self.stats_lock:
+            self.frame_count += 1
+        self._handle_jpeg(jpeg_bytes, self._next_filename())
+
+    def _handle_jpeg(self, jpeg_bytes: bytes, filename: str):
+        """Save and queue a finished JPEG for upload."""
+        # Save local copy if enabled
+        if self.save_local:
+            try:
+                self.save_q.put_nowait((jpeg_bytes, filename))
+            except queue.Full:
+                # The card can't keep up; skip this copy rather than buffer without limit
+                with self.stats_lock:
+                    self.save_dropped += 1
+                logger.debug("Save queue full, skipped local copy: %s", filename)
+
+        # Hand off to the uploaders, replacing any stale frame
+        self._enqueue_latest((jpeg_bytes, filename))
+
     def upload_image(self, jpeg_bytes: bytes, filename: str) -> bool:
         """
         Upload JPEG image to MASt3R-SLAM server.
@@ -136,88 +598,343 @@ class CameraClient:
         Returns:
             True if upload successful, False otherwise
         """
+        return self.upload_batch([(jpeg_bytes, filename)])
+
+    def upload_batch(self, frames: list[tuple[bytes, str]]) -> bool:
+        """
+        Upload one or more JPEG images to MASt3R-SLAM server in a single POST.
+
+        Args:
+            frames: List of (jpeg_bytes, filename) tuples, each sent as a
+                "file" part of the same multipart request
+
+        Returns:
+            True if upload successful, False otherwise
+
+        Raises:
+            One of CONNECTION_ERRORS if the server could not be reached, so
+            the caller can hold the frames instead of discarding them
+        """
         try:
-            files = {'file': (filename, jpeg_bytes, 'image/jpeg')}
-            response = requests.post(self.upload_url, files=files, timeout=30)
+            body = self._multipart_body(frames)
+            if self.transport == "httpx":
+                headers = {**self._upload_headers, "Content-Length": str(len(body))}
+                response = asyncio.run_coroutine_threadsafe(
+                    self._client.post(self.upload_url, content=body.aiter(), headers=headers), self._loop
+                ).result()
+            else:
+                response = self.session.post(
+                    self.upload_url,
+                    data=body,
+                    headers=self._upload_headers,
+                    timeout=30
+                )
 
             if response.status_code == 200:
-                data = response.json()
-                logger.info(f"✓ Uploaded: {filename} (Total images: {data.get('total_images', '?')})")
+                # Only decode the response body when the line will be logged
+                if logger.isEnabledFor(logging.INFO):
+                    try:
+                        total = response.json().get('total_images', '?')
+                    except ValueError:
+                        # Uploaded fine; the server just did not answer with JSON
+                        total = '?'
+                    if len(frames) == 1:
+                        logger.info("✓ Uploaded: %s (Total images: %s)", frames[0][1], total)
+                    else:
+                        logger.info("✓ Uploaded: %d frames (%s .. %s) (Total images: %s)",
+                                    len(frames), frames[0][1], frames[-1][1], total)
                 return True
             else:
-                logger.error(f"✗ Upload failed: {response.status_code}")
-                logger.error(f"Response: {response.text}")
+                logger.error("✗ Upload failed: %s", response.status_code)
+                logger.error("Response: %s", response.text)
                 return False
 
-        except requests.exceptions.RequestException as e:
-            logger.error(f"✗ Upload failed: {e}")
+        except CONNECTION_ERRORS:
+            raise
+        except UPLOAD_ERRORS as e:
+            logger.error("✗ Upload failed: %s", e)
             return False
 
+    def _multipart_body(self, frames: list[tuple[bytes, str]]) -> _MultipartBody:
+        """Frame JPEGs as "file" parts of a multipart body without copying them."""
+        parts = []
+        for jpeg_bytes, filename in frames:
+            parts += [self._part_preamble % filename.encode(), jpeg_bytes, self._part_end]
+        parts.append(self._body_end)
+        return _MultipartBody(parts)
+
+    def _enqueue_latest(self, item: tuple[bytes, str]):
+        """Queue a frame for upload, discarding any stale frame still waiting."""
+        while True:
+            try:
+                self.upload_q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.upload_q.get_nowait()
+                except queue.Empty:
+                    continue
+                with self.stats_lock:
+                    self.dropped += 1
+
+    def _upload_worker(self):
+        """Drain the upload queue until the shutdown sentinel arrives."""
+        if self.upload_core is not None:
+            _pin_current_thread({self.upload_core})
+
+        while True:
+            # Frames held during an outage go first, oldest first, so the
+            # server still receives frames in capture order
+            while self.server_up.is_set():
+                held = self._take_retries()
+                if not held:
+                    break
+                self._upload_counted(held)
+
+            item = self.upload_q.get()
+            if item is None:
+                break
+
+            # Collect up to `batch` frames, waiting at most one frame interval
+            batch = [item]
+            stopping = False
+            deadline = time.monotonic() + self.interval
+            while len(batch) < self.batch:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    item = self.upload_q.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if item is None:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            if self.server_up.is_set() and not self.retry_q:
+                self._upload_counted(batch)
+            else:
+                # Server is down, or older held frames must go first: hold
+                # these behind them rather than stall on a timeout
+                self._defer(batch)
+
+            if stopping:
+                break
+
+    def _upload_counted(self, batch: list[tuple[bytes, str]]):
+        """Upload a batch and record the outcome; never raises."""
+        try:
+            ok = self.upload_batch(batch)
+        except CONNECTION_ERRORS as e:
+            # Stop the other workers posting into the outage and keep the
+            # frames; the heartbeat marks the server up again when it answers
+            logger.warning("✗ Upload failed, holding %d frame(s): %s", len(batch), e)
+            self._set_server_up(False)
+            self._requeue(batch)
+            return
+        except Exception as e:
+            # Keep the calling thread alive whatever the transport throws
+            logger.error("✗ Upload failed: %s", e)
+            ok = False
+
+        with self.stats_lock:
+            if ok:
+                self.success_count += len(batch)
+            else:
+                self.fail_count += len(batch)
+
+    def _save_worker(self):
+        """Write queued local copies until the shutdown sentinel arrives."""
+        while True:
+            item = self.save_q.get()
+            if item is None:
+                break
+
+            try:
+                self.save_local_copy(*item)
+            except OSError as e:
+                logger.error("Failed to save local copy %s: %s", item[1], e)
+            logger.debug("Save queue depth: %d", self.save_q.qsize())
+
     def save_local_copy(self, jpeg_bytes: bytes, filename: str):
-        """Save local copy of image."""
+        """Save local copy of image without keeping it in the page cache."""
         save_path = self.save_dir / filename
-        with open(save_path, 'wb') as f:
-            f.write(jpeg_bytes)
-        logger.debug(f"Saved local copy: {save_path}")
+        fd = os.open(save_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+        try:
+            view = memoryview(jpeg_bytes)
+            while view:
+                view = view[os.write(fd, view):]
+            # The file is never read back, so let the kernel drop its pages.
+            # DONTNEED only drops clean pages, so write them back first.
+            if hasattr(os, 'posix_fadvise'):
+                os.fdatasync(fd)
+                os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+        finally:
+            os.close(fd)
+        logger.debug("Saved local copy: %s", save_path)
 
     def run(self):
-        """Main capture and upload loop."""
+        """Main capture loop; uploads happen on background threads."""
         logger.info(f"Starting capture loop at {self.fps} FPS")
         logger.info(f"Uploading to: {self.upload_url}")
         logger.info("Press Ctrl+C to stop")
+        logger.info(f"Filenames: {self._prefix}<frame>_<ns since prefix time>.jpg")
+        logger.info(f"Upload workers: {self.upload_workers}")
 
-        frame_count = 0
-        success_count = 0
-        fail_count = 0
+        last_drop_log = time.monotonic()
+        last_dropped = 0
 
-        try:
-            while True:
-                start_time = time.time()
+        if self.save_local:
+            self.save_thread = threading.Thread(target=self._save_worker, daemon=True)
+            self.save_thread.start()
 
-                try:
-                    # Capture as JPEG
-                    jpeg_bytes, filename = self.capture_and_convert()
-                    frame_count += 1
+        for _ in range(self.upload_workers):
+            thread = threading.Thread(target=self._upload_worker, daemon=True)
+            thread.start()
+            self.upload_threads.append(thread)
 
-                    # Save local copy if enabled
-                    if self.save_local:
-                        self.save_local_copy(jpeg_bytes, filename)
+        self.heartbeat_thread = threading.Thread(target=self._heartbeat_worker, daemon=True)
+        self.heartbeat_thread.start()
 
-                    # Upload to server
-                    if self.upload_image(jpeg_bytes, filename):
-                        success_count += 1
-                    else:
-                        fail_count += 1
+        # Pin only after the worker threads exist so they do not inherit it
+        if self.capture_core is not None:
+            logger.info(f"Pinning capture loop to CPU {self.capture_core}")
+            _pin_current_thread({self.capture_core}, fifo_priority=10)
 
-                except Exception as e:
-                    logger.error(f"Error processing frame: {e}")
-                    fail_count += 1
+        # Bind the methods the loop calls per frame to locals up front, and
+        # count frames and missed slots in locals that are written back when
+        # the loop exits. In encoder mode frames arrive via _on_encoded_frame
+        # and the loop only paces and reports progress.
+        capturing = self.capture_mode == "request"
+        capture = self.capture_and_convert
+        dispatch = self._dispatch_frame
+        interval = self.interval
+        monotonic = time.monotonic
+        sleep = time.sleep
+        frames = 0
+        missed = 0
 
-                # Calculate sleep time to maintain FPS
-                elapsed = time.time() - start_time
-                sleep_time = max(0, self.interval - elapsed)
+        try:
+            try:
+                # Pace against absolute monotonic deadlines so late wake-ups do not
+                # accumulate into drift and wall-clock jumps do not affect the rate
+                next_deadline = monotonic()
+                while True:
+                    start_time = monotonic()
 
-                if sleep_time > 0:
-                    time.sleep(sleep_time)
-                else:
-                    logger.warning(f"Frame processing took {elapsed:.2f}s, longer than interval {self.interval:.2f}s")
+                    if capturing:
+                        try:
+                            # Capture and encode asynchronously; saving and upload
+                            # hand-off happen once the JPEG is ready
+                            capture().add_done_callback(dispatch)
+                            frames += 1
+
+                        except Exception as e:
+                            logger.error("Error processing frame: %s", e)
+                            with self.stats_lock:
+                                self.fail_count += 1
+
+                    # Report dropped frames at most once per second
+                    dropped = self.dropped
+                    if dropped != last_dropped and start_time - last_drop_log >= 1.0:
+                        logger.warning("Uploads falling behind: dropped %d stale frames", dropped)
+                        last_dropped = dropped
+                        last_drop_log = start_time
+
+                    # Sleep until the next slot to maintain FPS
+                    next_deadline += interval
+                    sleep_time = next_deadline - monotonic()
+
+                    if sleep_time > 0:
+                        sleep(sleep_time)
+                    else:
+                        # Behind schedule: skip ahead instead of bursting to catch up
+                        skipped = int(-sleep_time // interval)
+                        missed += skipped
+                        logger.warning(
+                            "Frame processing took %.2fs, longer than interval %.2fs (skipped %d slots)",
+                            monotonic() - start_time, interval, skipped
+                        )
+                        next_deadline = monotonic()
+            finally:
+                with self.stats_lock:
+                    self.frame_count += frames
+                self.missed_slots += missed
 
         except KeyboardInterrupt:
             logger.info("\nStopping camera client...")
+            self._stop_capture()
+            self._stop_uploader()
+            self._stop_heartbeat()
+            self._stop_saver()
             logger.info(f"Statistics:")
-            logger.info(f"  Total frames: {frame_count}")
-            logger.info(f"  Successful uploads: {success_count}")
-            logger.info(f"  Failed uploads: {fail_count}")
+            logger.info(f"  Total frames: {self.frame_count}")
+            logger.info(f"  Successful uploads: {self.success_count}")
+            logger.info(f"  Failed uploads: {self.fail_count}")
+            logger.info(f"  Dropped frames: {self.dropped}")
+            logger.info(f"  Missed capture slots: {self.missed_slots}")
+            logger.info(f"  Unsent (server unreachable): {len(self.retry_q)}")
+            if self.save_local:
+                logger.info(f"  Skipped local copies: {self.save_dropped}")
 
         finally:
             self.cleanup()
 
+    def _stop_capture(self):
+        """Stop producing frames and wait for in-flight encodes."""
+        if self._capture_stopped:
+            return
+        self._capture_stopped = True
+        if self.capture_mode == "encoder":
+            self.camera.stop_encoder()
+        self.encoder.shutdown(wait=True)
+
+    def _stop_uploader(self):
+        """Flush pending uploads and stop the uploader threads."""
+        for _ in self.upload_threads:
+            self.upload_q.put(None)
+        for thread in self.upload_threads:
+            thread.join()
+        self.upload_threads = []
+
+    def _stop_heartbeat(self):
+        """Stop the heartbeat thread."""
+        if self.heartbeat_thread is None:
+            return
+        self._heartbeat_stop.set()
+        self.heartbeat_thread.join()
+        self.heartbeat_thread = None
+
+    def _stop_saver(self):
+        """Finish pending local writes and stop the save thread."""
+        if self.save_thread is None:
+            return
+        self.save_q.put(None)
+        self.save_thread.join()
+        self.save_thread = None
+
     def cleanup(self):
-        """Clean up camera resources."""
+        """Clean up camera and network resources."""
         logger.info("Cleaning up...")
+        if hasattr(self, 'camera'):
+            self._stop_capture()
+        if getattr(self, 'upload_threads', None):
+            self._stop_uploader()
+        if getattr(self, 'heartbeat_thread', None) is not None:
+            self._stop_heartbeat()
+        if getattr(self, 'save_thread', None) is not None:
+            self._stop_saver()
         if hasattr(self, 'camera'):
             self.camera.stop()
             self.camera.close()
+        if hasattr(self, 'session'):
+            self.session.close()
+        if hasattr(self, '_client'):
+            asyncio.run_coroutine_threadsafe(self._client.aclose(), self._loop).result()
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop_thread.join()
+            self._loop.close()
         logger.info("Camera client stopped")
 
 
@@ -236,6 +953,9 @@ Examples:
   # Faster capture rate (2 FPS)
   python camera_client.py --fps 2
 
+  # Full sensor resolution (Camera Module 3)
+  python camera_client.py --width 4608 --height 2592
+
   # Save local copies
   python camera_client.py --save-local
 
@@ -261,11 +981,69 @@ Examples:
         default=1.0,
         help='Frames per second to capture (default: 1.0)'
     )
+    parser.add_argument(
+        '--width',
+        type=int,
+        default=1280,
+        help='Capture width in pixels (default: 1280)'
+    )
+    parser.add_argument(
+        '--height',
+        type=int,
+        default=720,
+        help='Capture height in pixels (default: 720)'
+    )
     parser.add_argument(
         '--save-local',
         action='store_true',
         help='Save images locally as well'
     )
+    parser.add_argument(
+        '--upload-workers',
+        type=int,
+        default=1,
+        help='Number of concurrent uploads to the server; more than 1 can '
+             'deliver frames out of order (default: 1)'
+    )
+    parser.add_argument(
+        '--batch',
+        type=int,
+        default=1,
+        help='Maximum frames per upload request, if the server supports it (default: 1)'
+    )
+    parser.add_argument(
+        '--transport',
+        choices=['requests', 'httpx'],
+        default='requests',
+        help='HTTP client for uploads: requests (HTTP/1.1 keep-alive pool) or httpx '
+             '(HTTP/2 multiplexed, server must support h2c) (default: requests)'
+    )
+    parser.add_argument(
+        '--sndbuf',
+        type=int,
+        default=0,
+        help='Fixed socket send buffer size in bytes for uploads; 0 keeps kernel '
+             'autotuning (default: 0)'
+    )
+    parser.add_argument(
+        '--capture-mode',
+        choices=['request', 'encoder'],
+        default='request',
+        help='Capture frames from the loop and encode them in a worker pool (request), '
+             'or stream them through Picamera2\'s JpegEncoder (encoder) (default: request)'
+    )
+    parser.add_argument(
+        '--capture-core',
+        type=int,
+        default=None,
+        help='Pin the capture loop to this CPU core and run it SCHED_FIFO if permitted'
+    )
+    parser.add_argument(
+        '--upload-core',
+        type=int,
+        default=None,
+        help='Pin the upload workers to this CPU core'
+    )
     parser.add_argument(
         '--verbose',
         action='store_true',
@@ -278,13 +1056,25 @@ Examples:
     if args.verbose:
         logging.getLogger().setLevel(logging.DEBUG)
 
+    if setproctitle is not None:
+        setproctitle.setproctitle(f"mast3r-camera-client {args.host}:{args.port}")
+
     # Create and run client
     try:
         client = CameraClient(
             host=args.host,
             port=args.port,
             fps=args.fps,
-            save_local=args.save_local
+            save_local=args.save_local,
+            upload_workers=args.upload_workers,
+            capture_mode=args.capture_mode,
+            width=args.width,
+            height=args.height,
+            batch=args.batch,
+            transport=args.transport,
+            sndbuf=args.sndbuf,
+            capture_core=args.capture_core,
+            upload_core=args.upload_core
         )
         client.run()
     except Exception as e: